@@ -0,0 +1,57 @@
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.analysis import analyze, analyze_sample, analyze_sample_cached  # noqa: E402
+from src.catalog import ALFA_INVESTMENTS_THEMES  # noqa: E402
+from src.stylizer import build_constraints  # noqa: E402
+from tests.test_analysis import (  # noqa: E402
+    legacy_collect_emoji_whitelist,
+    legacy_detect_list_marker,
+    legacy_looks_like_refusal,
+    legacy_sanitize_output,
+)
+
+
+LINE = "📈 Индекс Мосбиржи вырос на 1,2% — до 3 200 пунктов, лидеры роста: Сбер, ЛУКОЙЛ, Яндекс.   \n"
+DIGEST = ("#ГлавноеЗаНеделю\n\n" + LINE * 6 + "\n🔥\n\n") * 8
+EXAMPLES = [DIGEST.replace("Сбер", f"Сбер {index}") for index in range(5)]
+THEME = ALFA_INVESTMENTS_THEMES[3]
+
+
+def bench(name: str, func, number: int = 200, repeat: int = 5) -> None:
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{name:<46} {best * 1e6:10.1f} us")
+
+
+def legacy_pipeline() -> None:
+    sanitized = legacy_sanitize_output(DIGEST)
+    legacy_looks_like_refusal(sanitized)
+    whitelist = legacy_collect_emoji_whitelist(DIGEST, EXAMPLES)
+    legacy_detect_list_marker(EXAMPLES, whitelist, DIGEST)
+
+
+def current_pipeline() -> None:
+    analyze(DIGEST)
+    build_constraints(THEME, DIGEST, EXAMPLES)
+
+
+def main() -> None:
+    print(f"Длина поста: {len(DIGEST)} символов, примеров: {len(EXAMPLES)}")
+    bench("analyze (ответ модели)", lambda: analyze(DIGEST))
+    bench("analyze_sample (без кэша)", lambda: analyze_sample(DIGEST))
+    analyze_sample_cached.cache_clear()
+    bench("build_constraints (холодный кэш)", lambda: (
+        analyze_sample_cached.cache_clear(),
+        build_constraints(THEME, DIGEST, EXAMPLES),
+    ))
+    bench("build_constraints (теплый кэш)", lambda: build_constraints(THEME, DIGEST, EXAMPLES))
+    bench("старый путь: sanitize+refusal+эмодзи+маркер", legacy_pipeline)
+    analyze_sample_cached.cache_clear()
+    bench("новый путь: analyze+build_constraints", current_pipeline)
+
+
+if __name__ == "__main__":
+    main()
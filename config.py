@@ -1,3 +1,12 @@
 MODEL_NAME = "gpt-4.1"
 TEMPERATURE = 1
 TOP_P = 0.9
+SEND_GLOBAL_RATE = 25
+SEND_CHAT_RATE = 1
+WORD_LIMIT_TOLERANCE = 0.1
+PROFILE_DIR = "profiles"
+PROFILE_SECONDS = 60
+PROFILE_REQUESTS = 20
+PROFILE_SLOW_CALLBACK = 0.1
+PROFILE_MAX_SECONDS = 600
+PROFILE_MAX_REQUESTS = 200
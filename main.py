@@ -1,15 +1,19 @@
 import asyncio
 import logging
+import signal
 from dataclasses import dataclass
 from typing import Dict, Optional
 
 from aiogram import Bot, Dispatcher, Router, F
-from aiogram.filters import CommandStart
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from dotenv import load_dotenv
 
+from config import PROFILE_MAX_REQUESTS, PROFILE_MAX_SECONDS, PROFILE_REQUESTS, PROFILE_SECONDS
 from src.catalog import CHANNELS, DEFAULT_CHANNEL_KEY, ChannelConfig, ThemeConfig
 from src.generator import TextGenerator
+from src.profiling import PipelineProfiler
+from src.sender import FollowUp, OutboundSender
 from src.settings import Settings
 from src.web import fetch_theme_samples
 
@@ -86,7 +90,12 @@ def ensure_theme(channel: ChannelConfig, state: SessionState) -> Optional[ThemeC
         return None
 
 
-def build_router(generator: TextGenerator) -> Router:
+def build_router(
+    generator: TextGenerator,
+    sender: OutboundSender,
+    profiler: PipelineProfiler,
+    admin_ids: frozenset[int],
+) -> Router:
     router = Router()
 
     @router.message(CommandStart())
@@ -96,7 +105,7 @@ def build_router(generator: TextGenerator) -> Router:
             " Отправь текст."
             " Сначала выбери канал и рубрику, затем пришли материалы."
         )
-        await message.answer(greeting, reply_markup=build_channels_keyboard())
+        await sender.send(message.chat.id, greeting, reply_markup=build_channels_keyboard())
 
     @router.callback_query(F.data.startswith("channel:"))
     async def handle_channel(callback: CallbackQuery) -> None:
@@ -113,11 +122,12 @@ def build_router(generator: TextGenerator) -> Router:
         state.examples = None
         logger.info("Выбран канал %s для чата %s", channel_key, callback.message.chat.id)
         channel = CHANNELS[channel_key]
-        await callback.message.answer(
+        await callback.answer()
+        await sender.send(
+            callback.message.chat.id,
             f"Канал «{channel.name}» выбран. Теперь выберите рубрику:",
             reply_markup=build_themes_keyboard(channel),
         )
-        await callback.answer()
 
     @router.callback_query(F.data.startswith("theme:"))
     async def handle_theme(callback: CallbackQuery) -> None:
@@ -147,17 +157,52 @@ def build_router(generator: TextGenerator) -> Router:
             theme.slug,
             callback.message.chat.id,
         )
-        await callback.message.answer(
+        await callback.answer()
+        await sender.send(
+            callback.message.chat.id,
             f"Отлично! Рубрика {theme.title} активна.\nПришли текст.",
         )
-        await callback.answer()
+
+    @router.message(Command("profile"))
+    async def handle_profile(message: Message, command: CommandObject) -> None:
+        if message.from_user is None or message.from_user.id not in admin_ids:
+            await sender.send(message.chat.id, "Команда недоступна.")
+            return
+        args = (command.args or "").split()
+        if args == ["stop"]:
+            run_dir = profiler.stop()
+            if run_dir is None:
+                await sender.send(message.chat.id, "Профилирование не запущено.")
+            else:
+                await sender.send(message.chat.id, f"Профилирование остановлено, результаты в {run_dir}")
+            return
+        try:
+            limits = [int(arg) for arg in args[:2]]
+        except ValueError:
+            limits = [0]
+        if any(limit <= 0 for limit in limits):
+            await sender.send(message.chat.id, "Формат: /profile [секунды] [запросы] или /profile stop")
+            return
+        seconds = min(limits[0], PROFILE_MAX_SECONDS) if limits else PROFILE_SECONDS
+        requests = min(limits[1], PROFILE_MAX_REQUESTS) if len(limits) > 1 else PROFILE_REQUESTS
+        run_dir = profiler.start(seconds, requests)
+        if run_dir is None:
+            await sender.send(message.chat.id, "Профилирование уже запущено или недоступно.")
+            return
+        logger.info("Профилирование запущено пользователем %s", message.from_user.id)
+        await sender.send(
+            message.chat.id,
+            f"Профилирование запущено на {seconds} с или {requests} запросов, результаты будут в {run_dir}",
+        )
 
     @router.message()
+    @profiler.track
     async def handle_text(message: Message) -> None:
         original_text = message.text or ""
         state = get_state(message.chat.id)
         if state.channel_key is None:
-            await message.answer(
+            await sender.send(
+                message.chat.id,
                 "Выбери канал, чтобы продолжить:",
                 reply_markup=build_channels_keyboard(),
             )
@@ -165,14 +210,15 @@ def build_router(generator: TextGenerator) -> Router:
         channel = ensure_channel(state)
         theme = ensure_theme(channel, state)
         if theme is None:
-            await message.answer(
+            await sender.send(
+                message.chat.id,
                 "Сначала выбери рубрику:",
                 reply_markup=build_themes_keyboard(channel),
             )
             return
         body, topic = split_topic(original_text)
         if not body:
-            await message.answer("Нужен текст, чтобы собрать пост.")
+            await sender.send(message.chat.id, "Нужен текст, чтобы собрать пост.")
             return
         examples = state.examples
         if examples is None:
@@ -196,16 +242,19 @@ def build_router(generator: TextGenerator) -> Router:
                 examples=examples,
             )
         except Exception:
-            await message.answer("Не получилось подготовить пост. Попробуй еще раз позже.")
+            await sender.send(message.chat.id, "Не получилось подготовить пост. Попробуй еще раз позже.")
             return
         if not result:
-            await message.answer("Ответ пустой. Попробуй переформулировать запрос.")
+            await sender.send(message.chat.id, "Ответ пустой. Попробуй переформулировать запрос.")
             return
         logger.info("Сообщение сгенерировано для чата %s", message.chat.id)
-        await message.answer(result)
-        await message.answer(
-            "Хочешь попробовать в другой рубрике?",
-            reply_markup=build_themes_keyboard(channel),
+        await sender.send(
+            message.chat.id,
+            result,
+            follow_up=FollowUp(
+                "Хочешь попробовать в другой рубрике?",
+                reply_markup=build_themes_keyboard(channel),
+            ),
         )
 
     return router
@@ -219,11 +268,20 @@ async def run() -> None:
     load_dotenv()
     settings = Settings.load()
     generator = TextGenerator(settings.openai_key)
+    profiler = PipelineProfiler(SESSIONS)
     bot = Bot(token=settings.bot_token, parse_mode="HTML")
+    sender = OutboundSender(bot)
     dispatcher = Dispatcher()
-    dispatcher.include_router(build_router(generator))
+    dispatcher.include_router(build_router(generator, sender, profiler, settings.admin_ids))
+    if hasattr(signal, "SIGUSR1"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, profiler.toggle)
     await bot.delete_webhook(drop_pending_updates=True)
-    await dispatcher.start_polling(bot)
+    try:
+        await dispatcher.start_polling(bot)
+    finally:
+        profiler.stop()
+        await profiler.flush()
+        await sender.close()
 
 
 def main() -> None:
@@ -0,0 +1,116 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence
+
+
+EMOJI_RANGES = "\u2600-\u27bf\U0001f000-\U0001faff"
+VARIATION_SELECTOR = "\ufe0f"
+NORMALIZE_TABLE = str.maketrans({"—": "-", "–": "-", "ё": "е", "Ё": "Е", "\r": "\n"})
+SPACE_RUN_PATTERN = re.compile(r" {3,}")
+EMOJI_PATTERN = re.compile(f"[{EMOJI_RANGES}]|{VARIATION_SELECTOR}")
+# Первый непробельный символ строки (границы строк как у str.splitlines),
+# если это эмодзи: берем его вместе с идущими следом селекторами вариантов.
+LINE_HEAD_PATTERN = re.compile(
+    r"(?:\A|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029])\s*"
+    f"([{EMOJI_RANGES}]{VARIATION_SELECTOR}*)"
+)
+REFUSAL_MARKERS = (
+    "я не могу", "не могу выполнить", "к сожалению", "жду", "ожидаю",
+    "пришлите текст", "как ии", "не имею возможности", "cannot", "sorry",
+)
+REFUSAL_PATTERN = re.compile("|".join(re.escape(marker) for marker in REFUSAL_MARKERS))
+
+
+@dataclass(frozen=True)
+class TextAnalysis:
+    raw: str
+    normalized: str
+    emoji: tuple[str, ...]
+    refusal: bool
+
+
+@dataclass(frozen=True)
+class SampleAnalysis:
+    emoji: tuple[str, ...]
+    line_heads: tuple[str, ...]
+
+
+def normalize_text(text: str) -> str:
+    if not text:
+        return text
+    text = SPACE_RUN_PATTERN.sub("  ", text.replace("\r\n", "\n").translate(NORMALIZE_TABLE))
+    merged: list[str] = []
+    for raw_line in text.split("\n"):
+        line = raw_line.rstrip()
+        stripped = line.lstrip()
+        # Пустые строки и одиночные символы вроде "!" или эмодзи приклеиваем к предыдущей строке.
+        if merged and len(stripped) <= 2 and not any(ch.isalnum() for ch in stripped):
+            merged[-1] = (merged[-1] + " " + stripped).strip()
+        else:
+            merged.append(line)
+    return "\n".join(merged).strip()
+
+
+def is_refusal(text: str) -> bool:
+    if not text:
+        return True
+    return REFUSAL_PATTERN.search(text.lower()) is not None
+
+
+def extract_emoji(text: str) -> tuple[str, ...]:
+    tokens: list[str] = []
+    for ch in EMOJI_PATTERN.findall(text):
+        if ch != VARIATION_SELECTOR:
+            tokens.append(ch)
+        elif tokens:
+            tokens[-1] += ch
+    return tuple(dict.fromkeys(tokens))
+
+
+# Каждый документ разбирается один раз фиксированным набором предкомпилированных
+# проходов: ответ модели нормализуем, исходник и примеры только сканируем.
+def analyze(text: str) -> TextAnalysis:
+    text = text or ""
+    normalized = normalize_text(text)
+    return TextAnalysis(
+        raw=text,
+        normalized=normalized,
+        emoji=extract_emoji(normalized),
+        refusal=is_refusal(normalized),
+    )
+
+
+def analyze_sample(text: str) -> SampleAnalysis:
+    text = text or ""
+    return SampleAnalysis(
+        emoji=extract_emoji(text),
+        line_heads=tuple(LINE_HEAD_PATTERN.findall(text)),
+    )
+
+
+@lru_cache(maxsize=256)
+def analyze_sample_cached(text: str) -> SampleAnalysis:
+    return analyze_sample(text)
+
+
+def collect_emoji_whitelist(analyses: Iterable[SampleAnalysis], limit: int = 20) -> list[str]:
+    whitelist: dict[str, None] = {}
+    for analysis in analyses:
+        whitelist.update(dict.fromkeys(analysis.emoji))
+    return list(whitelist)[:limit]
+
+
+def detect_list_marker(analyses: Iterable[SampleAnalysis], whitelist: Sequence[str]) -> Optional[str]:
+    if not whitelist:
+        return None
+    counts: dict[str, int] = {}
+    for analysis in analyses:
+        for head in analysis.line_heads:
+            for token in whitelist:
+                if head.startswith(token):
+                    counts[token] = counts.get(token, 0) + 1
+                    break
+    if not counts:
+        return None
+    return max(counts.items(), key=lambda kv: kv[1])[0]
@@ -1,13 +1,15 @@
 import asyncio
 import logging
-import re
-from typing import Optional, Sequence
+import time
+from typing import Dict, Optional, Sequence
 
 from openai import OpenAI
 
 from config import MODEL_NAME, TEMPERATURE, TOP_P
+from src.analysis import analyze
 from src.catalog import ThemeConfig
-from src.stylizer import theme_messages
+from src.stylizer import build_constraints, theme_messages
+from src.validator import ThemeValidationStats, validate_post
 
 
 class TextGenerator:
@@ -22,43 +24,25 @@ class TextGenerator:
         self.model = model
         self.temperature = temperature
         self.top_p = top_p
+        self.validation_stats: Dict[str, ThemeValidationStats] = {}
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    @staticmethod
-    def _sanitize_output(text: str) -> str:
-        if not text:
-            return text
-        sanitized = text.replace("—", "-").replace("–", "-")
-        sanitized = sanitized.replace("ё", "е").replace("Ё", "Е")
-        sanitized = sanitized.replace("\r\n", "\n").replace("\r", "\n")
-        sanitized = re.sub(r"\n{3,}", "\n\n", sanitized)
-        sanitized = "\n".join(line.rstrip() for line in sanitized.split("\n"))
-        sanitized = re.sub(r" {3,}", "  ", sanitized)
-        lines = sanitized.split("\n")
-        merged: list[str] = []
-        for line in lines:
-            stripped = line.strip()
-            is_symbolic = len(stripped) <= 2 and not any(ch.isalnum() for ch in stripped)
-            if is_symbolic and merged:
-                merged[-1] = (merged[-1].rstrip() + " " + stripped).strip()
-            else:
-                if stripped == "":
-                    if merged and merged[-1].strip() == "":
-                        continue
-                merged.append(line)
-        sanitized = "\n".join(merged).strip()
-        return sanitized
+    async def _complete(self, **kwargs):
+        submitted = time.perf_counter()
+        started = submitted
 
-    @staticmethod
-    def _looks_like_refusal(text: str) -> bool:
-        if not text:
-            return True
-        lowered = text.strip().lower()
-        bad_markers = [
-            "я не могу", "не могу выполнить", "к сожалению", "жду", "ожидаю",
-            "пришлите текст", "как ии", "не имею возможности", "cannot", "sorry",
-        ]
-        return any(marker in lowered for marker in bad_markers)
+        def call():
+            nonlocal started
+            started = time.perf_counter()
+            return self.client.chat.completions.create(**kwargs)
+
+        response = await asyncio.to_thread(call)
+        self.logger.info(
+            "OpenAI: ожидание пула потоков %.3f с, запрос %.3f с",
+            started - submitted,
+            time.perf_counter() - started,
+        )
+        return response
 
     async def generate_post(
         self,
@@ -68,7 +52,8 @@ class TextGenerator:
         extra_context: Optional[str] = None,
         examples: Optional[Sequence[str]] = None,
     ) -> str:
-        messages = theme_messages(theme, source_text, topic_hint, extra_context, examples)
+        constraints = build_constraints(theme, source_text, examples)
+        messages = theme_messages(theme, source_text, topic_hint, extra_context, examples, constraints)
         num_examples = len(examples) if examples else 0
         self.logger.info("Few-shot примеров: %d", num_examples)
         if examples:
@@ -91,33 +76,52 @@ class TextGenerator:
             self.temperature,
             self.top_p,
         )
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+        response = await self._complete(
             model=self.model,
             messages=messages,
             temperature=self.temperature,
             top_p=self.top_p,
         )
         choice = response.choices[0]
-        content = choice.message.content or ""
-        content = self._sanitize_output(content)
-        if self._looks_like_refusal(content):
-            self.logger.warning("Обнаружен отказ/служебный ответ, выполняю повторную генерацию")
+        report = validate_post(analyze(choice.message.content or ""), constraints)
+        if report.repairs:
+            self.logger.info("Локальные исправления: %s", "; ".join(report.repairs))
+        retry_seconds = None
+        if report.failures:
+            self.logger.warning(
+                "Проверка не пройдена (%s), выполняю повторную генерацию",
+                "; ".join(report.failures),
+            )
             reinforce = {
                 "role": "system",
                 "content": (
                     "Пересобери без служебных фраз и отказов. "
+                    f"Исправь: {'; '.join(report.failures)}. "
                     "Верни только текст поста в требуемом стиле."
                 ),
             }
-            second = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            started = time.perf_counter()
+            second = await self._complete(
                 model=self.model,
                 messages=[*messages, reinforce],
                 temperature=max(0.3, self.temperature - 0.2),
                 top_p=self.top_p,
             )
-            content = (second.choices[0].message.content or "").strip()
-            content = self._sanitize_output(content)
-        self.logger.info("Ответ модели получен, длина=%d", len(content))
-        return content
+            retry_seconds = time.perf_counter() - started
+            report = validate_post(analyze(second.choices[0].message.content or ""), constraints)
+            if report.failures:
+                self.logger.warning("Повторная генерация не прошла проверку: %s", "; ".join(report.failures))
+        stats = self.validation_stats.setdefault(theme.slug, ThemeValidationStats())
+        stats.record(report, retry_seconds)
+        self.logger.info(
+            "Валидация %s: запросов=%d исправлено=%d повторов=%d (%.0f%%, в среднем %.2f с) не прошло=%d",
+            theme.slug,
+            stats.requests,
+            stats.repaired,
+            stats.retried,
+            stats.retry_rate * 100,
+            stats.avg_retry_seconds,
+            stats.failed,
+        )
+        self.logger.info("Ответ модели получен, длина=%d", len(report.text))
+        return report.text
@@ -0,0 +1,212 @@
+import asyncio
+import cProfile
+import functools
+import itertools
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, Mapping, Optional, Set
+
+from config import (
+    PROFILE_DIR,
+    PROFILE_MAX_REQUESTS,
+    PROFILE_MAX_SECONDS,
+    PROFILE_REQUESTS,
+    PROFILE_SECONDS,
+    PROFILE_SLOW_CALLBACK,
+)
+from src.analysis import analyze_sample_cached
+
+
+TRACEMALLOC_FRAMES = 10
+logger = logging.getLogger("ghostwriter.profiling")
+
+
+class PipelineProfiler:
+    def __init__(self, sessions: Mapping[int, Any], output_dir: str = PROFILE_DIR) -> None:
+        self.sessions = sessions
+        self.output_dir = Path(output_dir)
+        self.run_dir: Optional[Path] = None
+        self.remaining = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._cleanup: Optional[ExitStack] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    @property
+    def active(self) -> bool:
+        return self.run_dir is not None
+
+    def start(self, seconds: float = PROFILE_SECONDS, requests: int = PROFILE_REQUESTS) -> Optional[Path]:
+        if self.active:
+            return None
+        if seconds <= 0 or requests <= 0:
+            logger.warning("Некорректные лимиты профилирования: %s с, %s запросов", seconds, requests)
+            return None
+        seconds = min(seconds, PROFILE_MAX_SECONDS)
+        requests = min(requests, PROFILE_MAX_REQUESTS)
+        loop = asyncio.get_running_loop()
+        with ExitStack() as cleanup:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                logger.exception("Не удалось включить профилировщик CPU")
+                return None
+            cleanup.callback(profile.disable)
+            try:
+                run_dir = self._make_run_dir()
+            except OSError:
+                logger.exception("Не удалось создать каталог для результатов профилирования")
+                return None
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                cleanup.callback(tracemalloc.stop)
+            baseline = tracemalloc.take_snapshot()
+
+            cleanup.callback(setattr, loop, "slow_callback_duration", loop.slow_callback_duration)
+            cleanup.callback(loop.set_debug, loop.get_debug())
+            loop.set_debug(True)
+            loop.slow_callback_duration = PROFILE_SLOW_CALLBACK
+
+            slow_log = logging.FileHandler(run_dir / "slow_callbacks.log", encoding="utf-8")
+            cleanup.callback(slow_log.close)
+            slow_log.setLevel(logging.WARNING)
+            slow_log.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            asyncio_logger = logging.getLogger("asyncio")
+            asyncio_logger.addHandler(slow_log)
+            cleanup.callback(asyncio_logger.removeHandler, slow_log)
+
+            self._cleanup = cleanup.pop_all()
+        self._profile = profile
+        self._baseline = baseline
+        self.run_dir = run_dir
+        self.remaining = requests
+        self._timer = loop.call_later(seconds, self.stop)
+        logger.warning(
+            "Профилирование включено на %.0f с или %d запросов, вывод в %s",
+            seconds,
+            requests,
+            run_dir,
+        )
+        return run_dir
+
+    def stop(self) -> Optional[Path]:
+        if not self.active:
+            return None
+        run_dir = self.run_dir
+        profile, baseline, cleanup = self._profile, self._baseline, self._cleanup
+        self.run_dir = None
+        self._profile = self._baseline = self._cleanup = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        snapshot = None
+        try:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+        except Exception:
+            logger.exception("Не удалось снять снимок памяти")
+        finally:
+            # Отключаем профилировщик, tracemalloc и debug-режим loop при любой
+            # ошибке выше: иначе их уже никто не выключит.
+            try:
+                cleanup.close()
+            except Exception:
+                logger.exception("Ошибка при выключении профилирования")
+
+        # Запись файлов и сравнение снимков тяжелые, поэтому уносим их с event loop.
+        summary = self._memory_summary()
+        task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self._write_results, run_dir, profile, snapshot, baseline, summary)
+        )
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+        logger.warning("Профилирование остановлено, результаты в %s", run_dir)
+        return run_dir
+
+    async def flush(self) -> None:
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def toggle(self) -> None:
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def track(self, handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(handler)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.request():
+                return await handler(*args, **kwargs)
+
+        return wrapper
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        try:
+            yield
+        finally:
+            if self.active:
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    self.stop()
+
+    def _make_run_dir(self) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        for attempt in itertools.count():
+            run_dir = self.output_dir / (f"{stamp}-{attempt}" if attempt else stamp)
+            try:
+                run_dir.mkdir(parents=True)
+            except FileExistsError:
+                continue
+            return run_dir
+
+    def _memory_summary(self) -> list[str]:
+        sessions_with_examples = 0
+        example_count = 0
+        example_bytes = 0
+        for state in list(self.sessions.values()):
+            examples = getattr(state, "examples", None)
+            if examples:
+                sessions_with_examples += 1
+                example_count += len(examples)
+                example_bytes += sum(sys.getsizeof(example) for example in examples)
+        return [
+            f"Сессий: {len(self.sessions)} (с примерами: {sessions_with_examples})",
+            f"Примеров в сессиях: {example_count}, {example_bytes / 1024:.1f} КиБ",
+            f"Кэш анализа примеров: {analyze_sample_cached.cache_info()}",
+        ]
+
+    @staticmethod
+    def _write_results(
+        run_dir: Path,
+        profile: cProfile.Profile,
+        snapshot: Optional[tracemalloc.Snapshot],
+        baseline: Optional[tracemalloc.Snapshot],
+        summary: list[str],
+    ) -> None:
+        try:
+            profile.dump_stats(run_dir / "cpu.prof")
+        except Exception:
+            logger.exception("Не удалось сохранить профиль CPU в %s", run_dir)
+        lines = list(summary)
+        if snapshot is not None:
+            try:
+                snapshot.dump(str(run_dir / "memory.tracemalloc"))
+            except Exception:
+                logger.exception("Не удалось сохранить снимок памяти в %s", run_dir)
+            if baseline is not None:
+                lines += ["", "Рост памяти за время профилирования (топ-30 по строкам):"]
+                lines += [str(stat) for stat in snapshot.compare_to(baseline, "lineno")[:30]]
+        try:
+            (run_dir / "memory.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        except Exception:
+            logger.exception("Не удалось сохранить отчет по памяти в %s", run_dir)
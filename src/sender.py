@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from config import SEND_CHAT_RATE, SEND_GLOBAL_RATE
+
+
+MESSAGE_LIMIT = 4096
+logger = logging.getLogger("ghostwriter.sender")
+
+
+class RateLimiter:
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = 0.0
+
+    def delay(self) -> float:
+        return max(0.0, self.next_slot - time.monotonic())
+
+    def defer(self, seconds: float) -> None:
+        self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        wait = self.next_slot - now
+        self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def utf16_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+@dataclass(frozen=True)
+class FollowUp:
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+
+
+@dataclass
+class OutgoingMessage:
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    waiter: asyncio.Future
+
+
+class OutboundSender:
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float = SEND_GLOBAL_RATE,
+        chat_rate: float = SEND_CHAT_RATE,
+    ) -> None:
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.global_limiter = RateLimiter(global_rate)
+        self.queues: Dict[int, Deque[OutgoingMessage]] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
+
+    def submit(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        item = OutgoingMessage(text=text, reply_markup=reply_markup, waiter=waiter)
+        self.queues.setdefault(chat_id, deque()).append(item)
+        if chat_id not in self.workers:
+            self.workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return waiter
+
+    async def send(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        follow_up: Optional[FollowUp] = None,
+    ) -> Message:
+        if follow_up is None:
+            return await self.submit(chat_id, text, reply_markup)
+        # Клавиатуру follow-up цепляем к самому сообщению, а его текст не отправляем:
+        # один вызов API вместо двух. Если склеить нельзя, шлем двумя сообщениями.
+        if reply_markup is None and utf16_len(text) <= MESSAGE_LIMIT:
+            return await self.submit(chat_id, text, follow_up.reply_markup)
+        message, _ = await asyncio.gather(
+            self.submit(chat_id, text, reply_markup),
+            self.submit(chat_id, follow_up.text, follow_up.reply_markup),
+        )
+        return message
+
+    async def close(self) -> None:
+        pending = [item for queue in self.queues.values() for item in queue]
+        workers = list(self.workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for item in pending:
+            item.waiter.cancel()
+
+    async def _drain(self, chat_id: int) -> None:
+        queue = self.queues[chat_id]
+        limiter = RateLimiter(self.chat_rate)
+        try:
+            while True:
+                while queue:
+                    await self._deliver(chat_id, queue.popleft(), limiter)
+                # Держим воркер, пока не истечет интервал чата, иначе новый
+                # воркер начнет с пустого лимитера и превысит частоту.
+                idle = limiter.delay()
+                if idle > 0:
+                    await asyncio.sleep(idle)
+                if not queue:
+                    break
+        finally:
+            self.queues.pop(chat_id, None)
+            self.workers.pop(chat_id, None)
+
+    async def _deliver(self, chat_id: int, item: OutgoingMessage, limiter: RateLimiter) -> None:
+        try:
+            while True:
+                await limiter.acquire()
+                await self.global_limiter.acquire()
+                try:
+                    message = await self.bot.send_message(
+                        chat_id=chat_id,
+                        text=item.text,
+                        reply_markup=item.reply_markup,
+                    )
+                except TelegramRetryAfter as error:
+                    logger.warning(
+                        "Flood control для чата %s, повтор через %s с",
+                        chat_id,
+                        error.retry_after,
+                    )
+                    limiter.defer(error.retry_after)
+                    continue
+                except Exception as error:
+                    if not item.waiter.done():
+                        item.waiter.set_exception(error)
+                    return
+                if not item.waiter.done():
+                    item.waiter.set_result(message)
+                return
+        except asyncio.CancelledError:
+            item.waiter.cancel()
+            raise
@@ -6,10 +6,14 @@ import os
 class Settings:
     bot_token: str
     openai_key: str
+    admin_ids: frozenset[int] = frozenset()
 
     @classmethod
     def load(cls) -> "Settings":
         return cls(
             bot_token=os.environ["BOT_TOKEN"],
             openai_key=os.environ["OPENAI_API_KEY"],
+            admin_ids=frozenset(
+                int(value) for value in os.environ.get("ADMIN_IDS", "").split(",") if value.strip()
+            ),
         )
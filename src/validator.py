@@ -0,0 +1,126 @@
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import WORD_LIMIT_TOLERANCE
+from src.analysis import VARIATION_SELECTOR, TextAnalysis, extract_emoji, normalize_text
+
+
+WORD_PATTERN = re.compile(r"\S*\w\S*")
+FORBIDDEN_PATTERN = re.compile("[ёЁ—–]")
+BULLET_CLASS = "[-•*·▪]"
+
+
+@dataclass(frozen=True)
+class PostConstraints:
+    max_words: int
+    emoji_whitelist: tuple[str, ...]
+    list_marker: Optional[str]
+    hashtag: str
+
+
+@dataclass
+class ValidationReport:
+    text: str
+    repairs: list[str] = field(default_factory=list)
+    failures: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ThemeValidationStats:
+    requests: int = 0
+    repaired: int = 0
+    retried: int = 0
+    failed: int = 0
+    retry_seconds: float = 0.0
+
+    def record(self, report: ValidationReport, retry_seconds: Optional[float] = None) -> None:
+        self.requests += 1
+        if report.repairs:
+            self.repaired += 1
+        if report.failures:
+            self.failed += 1
+        if retry_seconds is not None:
+            self.retried += 1
+            self.retry_seconds += retry_seconds
+
+    @property
+    def retry_rate(self) -> float:
+        return self.retried / self.requests if self.requests else 0.0
+
+    @property
+    def avg_retry_seconds(self) -> float:
+        return self.retry_seconds / self.retried if self.retried else 0.0
+
+
+def count_words(text: str) -> int:
+    return len(WORD_PATTERN.findall(text))
+
+
+def _strip_emoji(text: str, bases: set[str]) -> str:
+    pattern = re.compile(
+        "(?:" + "|".join(re.escape(base) for base in sorted(bases)) + f"){VARIATION_SELECTOR}* ?"
+    )
+    return normalize_text(pattern.sub("", text))
+
+
+def _replace_bullets(text: str, marker: str, emoji_bullets: set[str]) -> tuple[str, int]:
+    # Список - это хотя бы две подряд строки с одним и тем же маркером; одиночная
+    # строка с тире (цитата, реплика) маркером списка не считается.
+    bullet = "|".join(
+        [BULLET_CLASS, *(re.escape(base) + f"{VARIATION_SELECTOR}*" for base in sorted(emoji_bullets))]
+    )
+    bullet_pattern = re.compile(rf"^([ \t]*)(?:{bullet})(?=[ \t])", flags=re.MULTILINE)
+    block_pattern = re.compile(rf"^[ \t]*({bullet})[ \t].*(?:\n[ \t]*\1[ \t].*)+", flags=re.MULTILINE)
+    replaced = 0
+
+    def replace_block(block: re.Match) -> str:
+        nonlocal replaced
+        lines, count = bullet_pattern.subn(lambda match: match.group(1) + marker, block.group(0))
+        replaced += count
+        return lines
+
+    return block_pattern.sub(replace_block, text), replaced
+
+
+def _has_hashtag(text: str, hashtag: str) -> bool:
+    return re.search(rf"(?<!\w){re.escape(hashtag)}(?!\w)", text, flags=re.IGNORECASE) is not None
+
+
+def validate_post(analysis: TextAnalysis, constraints: PostConstraints) -> ValidationReport:
+    text = analysis.normalized
+    report = ValidationReport(text=text)
+    if analysis.refusal:
+        report.failures.append("ответ похож на отказ или служебную фразу")
+        return report
+
+    # Нормализация уже заменила их в тексте, здесь только фиксируем исправление.
+    if FORBIDDEN_PATTERN.search(analysis.raw):
+        report.repairs.append("заменены 'ё' и длинные тире")
+
+    allowed = {token.rstrip(VARIATION_SELECTOR) for token in constraints.emoji_whitelist}
+    extra = {token.rstrip(VARIATION_SELECTOR) for token in analysis.emoji} - allowed
+
+    # Маркеры меняем до удаления эмодзи: чужой эмодзи-буллет должен стать
+    # маркером рубрики, а не исчезнуть вместе с разметкой списка.
+    if constraints.list_marker:
+        text, replaced = _replace_bullets(text, constraints.list_marker, extra)
+        if replaced:
+            report.repairs.append(f"маркеры списка заменены на {constraints.list_marker} ({replaced})")
+            extra = {token.rstrip(VARIATION_SELECTOR) for token in extract_emoji(text)} - allowed
+
+    if extra:
+        text = _strip_emoji(text, extra)
+        report.repairs.append(f"удалены эмодзи вне списка: {' '.join(sorted(extra))}")
+
+    # Слова считаем до добавления хэштега: сама починка не должна вызывать повтор.
+    words = count_words(text)
+    if words > constraints.max_words * (1 + WORD_LIMIT_TOLERANCE):
+        report.failures.append(f"текст длиннее {constraints.max_words} слов ({words})")
+
+    if not _has_hashtag(text, constraints.hashtag):
+        text = f"{text}\n{constraints.hashtag}"
+        report.repairs.append(f"добавлен хэштег {constraints.hashtag}")
+
+    report.text = text
+    return report
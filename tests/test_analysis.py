@@ -0,0 +1,192 @@
+import random
+import re
+from typing import Optional, Sequence
+
+import pytest
+
+from src.analysis import (
+    analyze,
+    analyze_sample,
+    collect_emoji_whitelist,
+    detect_list_marker,
+    extract_emoji,
+    is_refusal,
+    normalize_text,
+)
+
+
+# Эталонные реализации до переноса в src/analysis.py
+# (TextGenerator._sanitize_output, _looks_like_refusal и хелперы src/stylizer.py).
+def legacy_sanitize_output(text: str) -> str:
+    if not text:
+        return text
+    sanitized = text.replace("—", "-").replace("–", "-")
+    sanitized = sanitized.replace("ё", "е").replace("Ё", "Е")
+    sanitized = sanitized.replace("\r\n", "\n").replace("\r", "\n")
+    sanitized = re.sub(r"\n{3,}", "\n\n", sanitized)
+    sanitized = "\n".join(line.rstrip() for line in sanitized.split("\n"))
+    sanitized = re.sub(r" {3,}", "  ", sanitized)
+    lines = sanitized.split("\n")
+    merged: list[str] = []
+    for line in lines:
+        stripped = line.strip()
+        is_symbolic = len(stripped) <= 2 and not any(ch.isalnum() for ch in stripped)
+        if is_symbolic and merged:
+            merged[-1] = (merged[-1].rstrip() + " " + stripped).strip()
+        else:
+            if stripped == "":
+                if merged and merged[-1].strip() == "":
+                    continue
+            merged.append(line)
+    sanitized = "\n".join(merged).strip()
+    return sanitized
+
+
+def legacy_looks_like_refusal(text: str) -> bool:
+    if not text:
+        return True
+    lowered = text.strip().lower()
+    bad_markers = [
+        "я не могу", "не могу выполнить", "к сожалению", "жду", "ожидаю",
+        "пришлите текст", "как ии", "не имею возможности", "cannot", "sorry",
+    ]
+    return any(marker in lowered for marker in bad_markers)
+
+
+def legacy_is_emoji_base(ch: str) -> bool:
+    code = ord(ch)
+    return (0x2600 <= code <= 0x27BF) or (0x1F000 <= code <= 0x1FAFF)
+
+
+def legacy_extract_emoji_tokens(text: str) -> list[str]:
+    tokens: list[str] = []
+    last_index = -1
+    for ch in text:
+        if legacy_is_emoji_base(ch):
+            tokens.append(ch)
+            last_index = len(tokens) - 1
+            continue
+        if ord(ch) == 0xFE0F and last_index >= 0:
+            tokens[last_index] = tokens[last_index] + ch
+    seen = set()
+    uniq: list[str] = []
+    for t in tokens:
+        if t not in seen:
+            seen.add(t)
+            uniq.append(t)
+    return uniq
+
+
+def legacy_collect_emoji_whitelist(source_text: str, examples: Optional[Sequence[str]]) -> list[str]:
+    whitelist: list[str] = []
+    for token in legacy_extract_emoji_tokens(source_text or ""):
+        if token not in whitelist:
+            whitelist.append(token)
+    if examples:
+        for ex in examples:
+            for token in legacy_extract_emoji_tokens(ex):
+                if token not in whitelist:
+                    whitelist.append(token)
+    return whitelist[:20]
+
+
+def legacy_detect_list_marker(
+    examples: Optional[Sequence[str]], whitelist: list[str], source_text: str
+) -> Optional[str]:
+    if not whitelist:
+        return None
+    counts: dict[str, int] = {}
+
+    def feed_line(line: str) -> None:
+        stripped = line.lstrip()
+        for token in whitelist:
+            if stripped.startswith(token):
+                counts[token] = counts.get(token, 0) + 1
+                break
+
+    if examples:
+        for ex in examples:
+            for line in ex.splitlines():
+                feed_line(line)
+    for line in (source_text or "").splitlines():
+        feed_line(line)
+    if not counts:
+        return None
+    return max(counts.items(), key=lambda kv: kv[1])[0]
+
+
+ALPHABET = [
+    *"ab ЁёЖ—–-!?.,1\t\n\n\r",
+    "\r\n", "    ", "\x85", "\x0b", " ", "️",
+    "✅", "📈", "☀", "🔥", "👉", "  ", "sorry", "Жду",
+]
+
+
+def random_text(rnd: random.Random) -> str:
+    return "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 30)))
+
+
+def random_cases(count: int, seed: int = 27):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        examples = [random_text(rnd) for _ in range(rnd.randint(0, 3))]
+        yield random_text(rnd), examples
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("", ""),
+        ("Рост — на 5%\r\nЁлка   и  ёж", "Рост - на 5%\nЕлка  и  еж"),
+        ("Первая строка\n\n\nВторая", "Первая строка\nВторая"),
+        ("  Индекс вырос\n🔥\n!!\nИтог   ", "Индекс вырос 🔥 !!\nИтог"),
+    ],
+)
+def test_normalize_text_golden(text, expected):
+    assert normalize_text(text) == expected
+    assert legacy_sanitize_output(text) == expected
+
+
+def test_normalize_and_refusal_match_legacy():
+    for text, _ in random_cases(20000):
+        normalized = normalize_text(text)
+        assert normalized == legacy_sanitize_output(text), repr(text)
+        assert is_refusal(normalized) == legacy_looks_like_refusal(normalized), repr(text)
+        analysis = analyze(text)
+        assert analysis.normalized == normalized
+        assert analysis.refusal == legacy_looks_like_refusal(normalized)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "   ", "Извините, я не могу", "SORRY, no", "Жду материалы", "Индекс вырос на 2%"],
+)
+def test_is_refusal_golden(text):
+    assert is_refusal(text) == legacy_looks_like_refusal(text)
+
+
+def test_extract_emoji_match_legacy():
+    assert extract_emoji("️☀️ a 📈 ☀️ 📈") == ("☀️", "📈")
+    for text, _ in random_cases(20000):
+        assert list(extract_emoji(text)) == legacy_extract_emoji_tokens(text), repr(text)
+
+
+def test_whitelist_and_list_marker_match_legacy():
+    for source, examples in random_cases(20000):
+        source_analysis = analyze_sample(source)
+        example_analyses = [analyze_sample(example) for example in examples]
+        whitelist = collect_emoji_whitelist([source_analysis, *example_analyses])
+        assert whitelist == legacy_collect_emoji_whitelist(source, examples), repr((source, examples))
+        marker = detect_list_marker([*example_analyses, source_analysis], whitelist)
+        assert marker == legacy_detect_list_marker(examples, whitelist, source), repr((source, examples))
+
+
+def test_list_marker_golden():
+    examples = ["#чтокупить\n📈 Сбер\n📈 Лукойл\n✅ Яндекс", "  📈 Газпром\r\n ✅ Итог"]
+    source = "✅ Рост\n✅ Падение"
+    analyses = [analyze_sample(example) for example in examples]
+    source_analysis = analyze_sample(source)
+    whitelist = collect_emoji_whitelist([source_analysis, *analyses])
+    assert whitelist == ["✅", "📈"]
+    assert detect_list_marker([*analyses, source_analysis], whitelist) == "✅"
+    assert legacy_detect_list_marker(examples, whitelist, source) == "✅"
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import shutil
+import tracemalloc
+
+from config import PROFILE_MAX_REQUESTS
+from src.profiling import PipelineProfiler
+
+
+def test_session_writes_profile_files(tmp_path):
+    async def scenario():
+        profiler = PipelineProfiler({}, output_dir=str(tmp_path))
+        run_dir = profiler.start(seconds=5, requests=1)
+
+        @profiler.track
+        async def handler():
+            return "ok"
+
+        assert await handler() == "ok"
+        assert not profiler.active
+        await profiler.flush()
+        return run_dir
+
+    run_dir = asyncio.run(scenario())
+    assert {path.name for path in run_dir.iterdir()} == {
+        "cpu.prof",
+        "memory.tracemalloc",
+        "memory.txt",
+        "slow_callbacks.log",
+    }
+
+
+def test_invalid_limits_rejected_and_large_clamped(tmp_path):
+    async def scenario():
+        profiler = PipelineProfiler({}, output_dir=str(tmp_path))
+        assert profiler.start(seconds=0) is None
+        assert profiler.start(requests=-1) is None
+        assert profiler.start(seconds=5, requests=10**6) is not None
+        remaining = profiler.remaining
+        profiler.stop()
+        await profiler.flush()
+        return remaining
+
+    assert asyncio.run(scenario()) == PROFILE_MAX_REQUESTS
+
+
+def test_teardown_restores_state_when_writes_fail(tmp_path):
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        handlers = list(logging.getLogger("asyncio").handlers)
+        profiler = PipelineProfiler({}, output_dir=str(tmp_path))
+        run_dir = profiler.start(seconds=5, requests=5)
+        assert loop.get_debug()
+        shutil.rmtree(run_dir)
+        profiler.stop()
+        await profiler.flush()
+        return loop.get_debug(), handlers, list(logging.getLogger("asyncio").handlers)
+
+    debug, handlers_before, handlers_after = asyncio.run(scenario())
+    assert not debug
+    assert handlers_after == handlers_before
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.sender import MESSAGE_LIMIT, FollowUp, OutboundSender, utf16_len
+
+
+class FakeBot:
+    def __init__(self, flood_chats=(), fail=False, block=False) -> None:
+        self.calls: list[tuple[float, int, str, object]] = []
+        self.flood_chats = set(flood_chats)
+        self.fail = fail
+        self.release = asyncio.Event()
+        if not block:
+            self.release.set()
+        self.started = time.monotonic()
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        await self.release.wait()
+        if chat_id in self.flood_chats:
+            self.flood_chats.discard(chat_id)
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "flood", 1)
+        if self.fail:
+            raise RuntimeError("send failed")
+        self.calls.append((time.monotonic() - self.started, chat_id, text, reply_markup))
+        return f"sent:{text}"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_follow_up_keyboard_attached_in_one_call():
+    async def scenario():
+        bot = FakeBot()
+        sender = OutboundSender(bot, chat_rate=100)
+        message = await sender.send(1, "post", follow_up=FollowUp("Еще рубрику?", reply_markup="kb"))
+        await sender.close()
+        return bot, message
+
+    bot, message = run(scenario())
+    assert message == "sent:post"
+    assert [(chat, text, markup) for _, chat, text, markup in bot.calls] == [(1, "post", "kb")]
+
+
+def test_follow_up_sent_separately_when_post_does_not_fit():
+    post = "😀" * (MESSAGE_LIMIT // 2 + 1)
+    assert len(post) <= MESSAGE_LIMIT < utf16_len(post)
+
+    async def scenario():
+        bot = FakeBot()
+        sender = OutboundSender(bot, chat_rate=100)
+        await sender.send(1, post, follow_up=FollowUp("Еще рубрику?", reply_markup="kb"))
+        await sender.close()
+        return bot
+
+    bot = run(scenario())
+    assert [(text, markup) for _, _, text, markup in bot.calls] == [(post, None), ("Еще рубрику?", "kb")]
+
+
+def test_unrelated_messages_are_not_merged():
+    async def scenario():
+        bot = FakeBot()
+        sender = OutboundSender(bot, chat_rate=100)
+        await asyncio.gather(sender.submit(1, "ошибка"), sender.submit(1, "подсказка", "kb"))
+        await sender.close()
+        return bot
+
+    bot = run(scenario())
+    assert [(text, markup) for _, _, text, markup in bot.calls] == [("ошибка", None), ("подсказка", "kb")]
+
+
+def test_flood_wait_in_one_chat_does_not_delay_another():
+    async def scenario():
+        bot = FakeBot(flood_chats={2})
+        sender = OutboundSender(bot, chat_rate=100)
+        await asyncio.gather(sender.send(2, "flooded"), sender.send(1, "free"))
+        await sender.close()
+        return bot
+
+    bot = run(scenario())
+    sent_at = {chat: elapsed for elapsed, chat, _, _ in bot.calls}
+    assert sent_at[1] < 0.5
+    assert sent_at[2] >= 1
+
+
+def test_failure_propagates_to_every_waiter():
+    async def scenario():
+        bot = FakeBot(fail=True)
+        sender = OutboundSender(bot, chat_rate=100)
+        with pytest.raises(RuntimeError):
+            await sender.send(1, "post", follow_up=FollowUp("Еще?", reply_markup="kb"))
+        waiters = [sender.submit(1, "a", "kb1"), sender.submit(1, "b")]
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        await sender.close()
+        return results
+
+    results = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_close_cancels_pending_futures():
+    async def scenario():
+        bot = FakeBot(block=True)
+        sender = OutboundSender(bot, chat_rate=100)
+        waiters = [sender.submit(1, "a"), sender.submit(1, "b"), sender.submit(2, "c")]
+        await asyncio.sleep(0)
+        await sender.close()
+        return bot, waiters, sender
+
+    bot, waiters, sender = run(scenario())
+    assert all(waiter.cancelled() for waiter in waiters)
+    assert bot.calls == []
+    assert sender.workers == {}
@@ -0,0 +1,58 @@
+from src.analysis import analyze
+from src.validator import PostConstraints, count_words, validate_post
+
+
+CONSTRAINTS = PostConstraints(
+    max_words=120,
+    emoji_whitelist=("🔹", "📈"),
+    list_marker="🔹",
+    hashtag="#АльфаИндекс",
+)
+
+
+def test_forbidden_chars_reported_as_repair():
+    report = validate_post(analyze("Ёлка — выросла #АльфаИндекс"), CONSTRAINTS)
+    assert report.text == "Елка - выросла #АльфаИндекс"
+    assert report.repairs == ["заменены 'ё' и длинные тире"]
+    assert report.failures == []
+
+
+def test_single_dash_line_is_not_a_list():
+    report = validate_post(analyze("Итоги недели\n— Цитата дня\n#АльфаИндекс"), CONSTRAINTS)
+    assert "- Цитата дня" in report.text
+    assert not any("маркеры" in repair for repair in report.repairs)
+
+
+def test_list_bullets_replaced_with_marker():
+    report = validate_post(analyze("Итоги\n- Сбер\n- Лукойл\n#АльфаИндекс"), CONSTRAINTS)
+    assert report.text == "Итоги\n🔹 Сбер\n🔹 Лукойл\n#АльфаИндекс"
+
+
+def test_unknown_emoji_removed():
+    report = validate_post(analyze("Рост 🚀 индекса 📈 #АльфаИндекс"), CONSTRAINTS)
+    assert report.text == "Рост индекса 📈 #АльфаИндекс"
+
+
+def test_appended_hashtag_does_not_trigger_retry():
+    text = " ".join(["слово"] * 132)
+    report = validate_post(analyze(text), CONSTRAINTS)
+    assert report.failures == []
+    assert report.text.endswith("\n#АльфаИндекс")
+    assert count_words(report.text) == 133
+
+
+def test_over_limit_and_refusal_fail():
+    assert validate_post(analyze("слово " * 200), CONSTRAINTS).failures
+    assert validate_post(analyze("Sorry, не могу"), CONSTRAINTS).failures
+
+
+def test_unknown_emoji_bullets_become_rubric_marker():
+    report = validate_post(analyze("Идеи\n🚀 Сбер\n🚀 Лукойл\nРост 🚀\n#АльфаИндекс"), CONSTRAINTS)
+    assert report.text == "Идеи\n🔹 Сбер\n🔹 Лукойл\nРост\n#АльфаИндекс"
+
+
+def test_hashtag_matched_as_whole_word():
+    report = validate_post(analyze("Подборка #АльфаИндексСейчас"), CONSTRAINTS)
+    assert report.text.endswith("\n#АльфаИндекс")
+    report = validate_post(analyze("Подборка #альфаиндекс, итоги"), CONSTRAINTS)
+    assert report.repairs == []